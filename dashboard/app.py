@@ -1,123 +1,275 @@
 
+import os
 import streamlit as st
 import sqlite3
 import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.dates import DateFormatter
 import numpy as np
 
+try:
+    import connectorx as cx
+except ImportError:  # optional: faster Arrow-native SQLite reads
+    cx = None
+
 DB_PATH = "evaluation/eval_results.db"
+CSS_PATH = os.path.join(os.path.dirname(__file__), "style.css")
+
+# Numeric projection used by every chart; query/context are only read by load_raw
+SCORE_COLUMNS = "id, trace_id, model_name, sample_id, faithfulness, relevance, latency, created_at"
+SORT_COLUMNS = ["created_at", "faithfulness", "relevance", "latency"]
+PAGE_SIZE = 500
+# The persisted snapshot covers ids up to max_id() rounded down to this bucket,
+# so every session shares one base until another SNAPSHOT_BUCKET rows arrive
+SNAPSHOT_BUCKET = 1000
+# The FTS5 trigram tokenizer can only match terms of at least three characters
+FTS_MIN_TERM = 3
+SCORE_DTYPES = {
+    "faithfulness": "int8",
+    "relevance": "int8",
+    "latency": "float32",
+    "model_name": "category",
+    "sample_id": "category",
+}
+CATEGORY_COLUMNS = [col for col, dtype in SCORE_DTYPES.items() if dtype == "category"]
+
+
+def _filter_clause(model_sel, sample_sel):
+    """Build a parameterized WHERE clause for the sidebar model/sample filters."""
+    model_ph = ", ".join("?" for _ in model_sel)
+    sample_ph = ", ".join("?" for _ in sample_sel)
+    clause = f"model_name IN ({model_ph}) AND sample_id IN ({sample_ph})"
+    return clause, [*model_sel, *sample_sel]
+
+
+def _read_sql(query: str) -> pd.DataFrame:
+    """Read a parameterless query, via connectorx's Arrow path when it is installed."""
+    if cx is not None:
+        table = cx.read_sql(f"sqlite://{os.path.abspath(DB_PATH)}", query, return_type="arrow")
+        return table.to_pandas()
+    conn = sqlite3.connect(DB_PATH)
+    df = pd.read_sql_query(query, conn)
+    conn.close()
+    return df
 
-# Custom CSS for modern styling
-st.markdown("""
-<style>
-    /* Main container styling */
-    .main {
-        padding: 0rem 1rem;
-    }
-    
-    /* Header styling */
-    h1 {
-        color: #1f2937;
-        font-weight: 700;
-        margin-bottom: 0.5rem;
-    }
-    
-    h2 {
-        color: #374151;
-        font-weight: 600;
-        margin-top: 2rem;
-        padding-bottom: 0.5rem;
-        border-bottom: 2px solid #e5e7eb;
-    }
-    
-    /* Metric cards */
-    .metric-card {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        padding: 1.5rem;
-        border-radius: 12px;
-        color: white;
-        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-        margin-bottom: 1rem;
-    }
-    
-    .metric-label {
-        font-size: 0.875rem;
-        font-weight: 500;
-        opacity: 0.9;
-        margin-bottom: 0.25rem;
-    }
-    
-    .metric-value {
-        font-size: 2rem;
-        font-weight: 700;
-    }
-    
-    /* Info boxes */
-    .info-box {
-        background: #f0f9ff;
-        border-left: 4px solid #3b82f6;
-        padding: 1rem;
-        border-radius: 8px;
-        margin: 1rem 0;
-    }
-    
-    .success-box {
-        background: #f0fdf4;
-        border-left: 4px solid #22c55e;
-        padding: 1rem;
-        border-radius: 8px;
-        margin: 1rem 0;
-    }
-    
-    /* Sidebar styling */
-    .css-1d391kg {
-        background-color: #f9fafb;
-    }
-    
-    /* Button styling */
-    .stButton>button {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        border: none;
-        border-radius: 8px;
-        padding: 0.5rem 2rem;
-        font-weight: 600;
-        transition: all 0.3s;
-    }
-    
-    .stButton>button:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 4px 12px rgba(102, 126, 234, 0.4);
-    }
-    
-    /* Dataframe styling */
-    .dataframe {
-        border-radius: 8px;
-        overflow: hidden;
-    }
+
+def epoch_to_datetime(col: pd.Series) -> np.ndarray:
+    """Integer epoch seconds as datetime64[s], a view on the int64 buffer (no parsing)."""
+    return col.to_numpy(dtype="int64").view("datetime64[s]")
+
+
+def db_fingerprint() -> tuple:
+    """(mtime, size) of the DB and its WAL file; changes whenever rows are written."""
+    stats = []
+    for path in (DB_PATH, DB_PATH + "-wal"):
+        try:
+            info = os.stat(path)
+            stats.append((info.st_mtime_ns, info.st_size))
+        except FileNotFoundError:
+            stats.append(None)
+    return tuple(stats)
+
+
+def db_identity():
+    """(device, inode) of the DB file, or None if it is missing; changes when the file is replaced."""
+    try:
+        info = os.stat(DB_PATH)
+    except FileNotFoundError:
+        return None
+    return info.st_dev, info.st_ino
+
+
+def max_id() -> int:
+    """Highest row id; AUTOINCREMENT ids follow insert order, unlike created_at."""
+    conn = sqlite3.connect(DB_PATH)
+    (latest,) = conn.execute("SELECT MAX(id) FROM evaluations").fetchone()
+    conn.close()
+    return int(latest or 0)
+
+
+@st.cache_data(max_entries=4)
+def snapshot_watermark(fingerprint) -> int:
+    """max_id() rounded down to SNAPSHOT_BUCKET, shared by every session."""
+    return max_id() // SNAPSHOT_BUCKET * SNAPSHOT_BUCKET
+
+
+def _read_scores(where: str) -> pd.DataFrame:
+    # Newest first, matching the detail table's default order
+    df = _read_sql(f"SELECT {SCORE_COLUMNS} FROM evaluations WHERE {where} ORDER BY created_at DESC")
+    df["created_at"] = epoch_to_datetime(df["created_at"])
+    # Scores are 0–5 and names repeat heavily, so keep the frame narrow
+    return df.astype(SCORE_DTYPES)
+
+
+# Cached readers take the fingerprint as their first argument, so new
+# evaluations produce a new cache key instead of a stale dashboard.
+
+@st.cache_data(persist="disk", max_entries=4)
+def _base_snapshot(identity, watermark: int, check: tuple) -> pd.DataFrame:
+    """
+    Rows up to the watermark id; stable across inserts, so it stays cached.
     
-    /* Chart container */
-    .chart-container {
-        background: white;
-        padding: 1.5rem;
-        border-radius: 12px;
-        box-shadow: 0 1px 3px rgba(0, 0, 0, 0.1);
-        margin-bottom: 2rem;
-    }
-</style>
-""", unsafe_allow_html=True)
-
-@st.cache_data
-def load_data():
+    identity and check only key the cache: a replaced or refilled DB file, or
+    deleted rows at or below the watermark, must not be served from disk.
+    """
+    return _read_scores(f"id <= {int(watermark)}")
+
+
+def _snapshot_check(watermark: int) -> tuple:
+    """Row count up to the watermark plus the trace_id/created_at of the last of those rows."""
+    conn = sqlite3.connect(DB_PATH)
+    check = conn.execute("""
+        SELECT COUNT(*),
+               (SELECT trace_id FROM evaluations WHERE id <= ?1 ORDER BY id DESC LIMIT 1),
+               (SELECT created_at FROM evaluations WHERE id <= ?1 ORDER BY id DESC LIMIT 1)
+        FROM evaluations WHERE id <= ?1
+    """, (int(watermark),)).fetchone()
+    conn.close()
+    return tuple(check)
+
+
+def _prepend_tail(tail: pd.DataFrame, base: pd.DataFrame) -> pd.DataFrame:
+    """Stack newer tail rows on the base without re-sorting or re-casting the history."""
+    for col in CATEGORY_COLUMNS:
+        # Give both frames the same categories so concat keeps the categorical dtype
+        extra = tail[col].cat.categories.difference(base[col].cat.categories)
+        base[col] = base[col].cat.add_categories(extra)
+        tail[col] = tail[col].cat.set_categories(base[col].cat.categories)
+    return pd.concat([tail, base], ignore_index=True)
+
+
+@st.cache_data(max_entries=4)
+def load_scores(fingerprint, identity, watermark: int) -> pd.DataFrame:
+    """Cached base snapshot plus the (small) tail of rows written after the watermark."""
+    base = _base_snapshot(identity, watermark, _snapshot_check(watermark))
+    tail = _read_scores(f"id > {int(watermark)}")
+    if tail.empty:
+        return base
+    df = _prepend_tail(tail, base)
+    # Both parts are newest first; a late insert with an older created_at
+    # (batched or buffered saves) is the only case that needs a full re-sort
+    if base.empty or tail["created_at"].iloc[-1] >= base["created_at"].iloc[0]:
+        return df
+    return df.sort_values("created_at", ascending=False, kind="stable", ignore_index=True)
+
+
+@st.cache_data(ttl="5m", max_entries=4)
+def get_filter_options(fingerprint):
+    """Distinct model names and sample ids for the sidebar, read off the indexes."""
+    conn = sqlite3.connect(DB_PATH)
+    models = [row[0] for row in conn.execute(
+        "SELECT DISTINCT model_name FROM evaluations ORDER BY model_name")]
+    sample_ids = [row[0] for row in conn.execute(
+        "SELECT DISTINCT sample_id FROM evaluations ORDER BY sample_id")]
+    conn.close()
+    return models, sample_ids
+
+
+@st.cache_data(max_entries=4)
+def has_search_index(fingerprint) -> bool:
+    conn = sqlite3.connect(DB_PATH)
+    found = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='evaluations_fts'"
+    ).fetchone()
+    conn.close()
+    return found is not None
+
+
+def _detail_clause(fingerprint, model_sel, sample_sel, search_term):
+    """Sidebar filters plus the search box, as one parameterized WHERE clause."""
+    where, params = _filter_clause(model_sel, sample_sel)
+    if not search_term:
+        return where, params
+    if len(search_term) >= FTS_MIN_TERM and has_search_index(fingerprint):
+        where += " AND id IN (SELECT rowid FROM evaluations_fts WHERE evaluations_fts MATCH ?)"
+        params.append('"' + search_term.replace('"', '""') + '"')
+    else:
+        # Too short for the trigram index: case-insensitive LIKE on both columns
+        pattern = "%" + search_term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        where += " AND (model_name LIKE ? ESCAPE '\\' OR sample_id LIKE ? ESCAPE '\\')"
+        params += [pattern, pattern]
+    return where, params
+
+
+@st.cache_data(max_entries=64)
+def count_detail_rows(fingerprint, model_sel, sample_sel, search_term: str) -> int:
+    where, params = _detail_clause(fingerprint, model_sel, sample_sel, search_term)
     conn = sqlite3.connect(DB_PATH)
-    df = pd.read_sql_query("SELECT * FROM evaluations", conn)
+    (total,) = conn.execute(f"SELECT COUNT(*) FROM evaluations WHERE {where}", params).fetchone()
     conn.close()
-    if not df.empty:
-        df["created_at"] = pd.to_datetime(df["created_at"], unit="s", errors="coerce")
+    return total
+
+
+@st.cache_data(max_entries=64)
+def load_detail_page(fingerprint, model_sel, sample_sel, search_term: str,
+                     sort_column: str, ascending: bool, page: int) -> pd.DataFrame:
+    """One PAGE_SIZE page of the detail table, filtered and ordered by SQLite."""
+    if sort_column not in SORT_COLUMNS:
+        raise ValueError(f"unsupported sort column: {sort_column}")
+    where, params = _detail_clause(fingerprint, model_sel, sample_sel, search_term)
+    direction = "ASC" if ascending else "DESC"
+    conn = sqlite3.connect(DB_PATH)
+    df = pd.read_sql_query(f"""
+        SELECT {SCORE_COLUMNS}
+        FROM evaluations
+        WHERE {where}
+        ORDER BY {sort_column} {direction}, id {direction}
+        LIMIT ? OFFSET ?
+    """, conn, params=[*params, PAGE_SIZE, page * PAGE_SIZE])
+    conn.close()
+    df["created_at"] = epoch_to_datetime(df["created_at"])
+    return df
+
+
+@st.cache_data(ttl="5m", max_entries=32)
+def trend_slice(fingerprint, identity, watermark: int, model_name: str) -> pd.DataFrame:
+    """Time-ordered scores for one model, shared by the trend and latency charts."""
+    df = load_scores(fingerprint, identity, watermark)
+    cols = ["created_at", "faithfulness", "relevance", "latency"]
+    # load_scores returns newest first; reversing is cheaper than re-sorting
+    return df.loc[df["model_name"] == model_name, cols].iloc[::-1]
+
+
+@st.cache_data(max_entries=32)
+def agg_by_model(fingerprint, model_sel, sample_sel):
+    """Per-model average scores, aggregated by SQLite instead of pandas."""
+    where, params = _filter_clause(model_sel, sample_sel)
+    conn = sqlite3.connect(DB_PATH)
+    agg = pd.read_sql_query(f"""
+        SELECT model_name,
+               COUNT(*) AS evaluations,
+               AVG(faithfulness) AS faithfulness,
+               AVG(relevance) AS relevance,
+               AVG(latency) AS latency
+        FROM evaluations
+        WHERE {where}
+        GROUP BY model_name
+        ORDER BY model_name
+    """, conn, params=params)
+    conn.close()
+    return agg
+
+
+# Each entry holds the full query/context text, so keep very few
+@st.cache_data(max_entries=2)
+def load_raw(fingerprint, model_sel, sample_sel):
+    """Full rows (including query/context) for the Raw Evaluation Rows view."""
+    where, params = _filter_clause(model_sel, sample_sel)
+    conn = sqlite3.connect(DB_PATH)
+    df = pd.read_sql_query(
+        f"SELECT * FROM evaluations WHERE {where} ORDER BY created_at DESC",
+        conn,
+        params=params,
+    )
+    conn.close()
+    df["created_at"] = epoch_to_datetime(df["created_at"])
     return df
 
 
+@st.cache_resource
+def load_css() -> str:
+    """Read the stylesheet once per server process."""
+    with open(CSS_PATH, encoding="utf-8") as f:
+        return f.read()
+
 
 # Page Configuration
 
@@ -128,6 +280,10 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Custom CSS for modern styling; Streamlit drops elements a rerun doesn't
+# re-emit, so the (cached) stylesheet is written on every run
+st.markdown(f"<style>\n{load_css()}</style>", unsafe_allow_html=True)
+
 # Header
 col1, col2 = st.columns([3, 1])
 with col1:
@@ -135,7 +291,15 @@ with col1:
     st.markdown("Monitor and analyze your model performance metrics in real-time")
 
 # Load data
-df = load_data()
+fingerprint = db_fingerprint()
+identity = db_identity()
+if identity is None:
+    # No DB file yet; don't let sqlite3.connect create an empty one
+    df = pd.DataFrame()
+else:
+    # Rows up to this id come from the persisted snapshot
+    watermark = snapshot_watermark(fingerprint)
+    df = load_scores(fingerprint, identity, watermark)
 if df.empty:
     st.error("⚠️ No evaluation data found. Please run evaluations first.")
     st.stop()
@@ -146,7 +310,7 @@ if df.empty:
 st.sidebar.header("🎛️ Filters")
 st.sidebar.markdown("---")
 
-models = sorted(df["model_name"].unique())
+models, sample_ids = get_filter_options(fingerprint)
 model_sel = st.sidebar.multiselect(
     "📦 Select Models",
     models,
@@ -154,7 +318,6 @@ model_sel = st.sidebar.multiselect(
     help="Choose one or more models to analyze"
 )
 
-sample_ids = sorted(df["sample_id"].unique())
 sample_sel = st.sidebar.multiselect(
     "🔖 Select Sample IDs",
     sample_ids,
@@ -165,19 +328,23 @@ sample_sel = st.sidebar.multiselect(
 st.sidebar.markdown("---")
 st.sidebar.info("💡 **Tip:** Use filters to focus on specific models or samples")
 
-# Filter data
-filtered = df[df["model_name"].isin(model_sel) & df["sample_id"].isin(sample_sel)]
+# Per-model averages from SQLite; the overview weights them by evaluation count
+agg = agg_by_model(fingerprint, tuple(model_sel), tuple(sample_sel))
+
+
+def overall_mean(col: str) -> float:
+    return (agg[col] * agg["evaluations"]).sum() / agg["evaluations"].sum()
 
 
 #  Key Metrics Summary
 
-if not filtered.empty:
+if not agg.empty:
     st.markdown("### 📈 Key Metrics Overview")
     
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        total_evals = len(filtered)
+        total_evals = int(agg["evaluations"].sum())
         st.metric(
             label="Total Evaluations",
             value=f"{total_evals:,}",
@@ -185,7 +352,7 @@ if not filtered.empty:
         )
     
     with col2:
-        avg_faithfulness = filtered["faithfulness"].mean()
+        avg_faithfulness = overall_mean("faithfulness")
         st.metric(
             label="Avg Faithfulness",
             value=f"{avg_faithfulness:.2f}",
@@ -193,7 +360,7 @@ if not filtered.empty:
         )
     
     with col3:
-        avg_relevance = filtered["relevance"].mean()
+        avg_relevance = overall_mean("relevance")
         st.metric(
             label="Avg Relevance",
             value=f"{avg_relevance:.2f}",
@@ -201,7 +368,7 @@ if not filtered.empty:
         )
     
     with col4:
-        avg_latency = filtered["latency"].mean()
+        avg_latency = overall_mean("latency")
         st.metric(
             label="Avg Latency",
             value=f"{avg_latency:.2f}s",
@@ -215,43 +382,16 @@ if not filtered.empty:
 
 st.markdown("### 📊 Average Scores by Model")
 
-if not filtered.empty:
-    numeric_cols = ["faithfulness", "relevance", "latency"]
-    agg = (
-        filtered.groupby("model_name")[numeric_cols]
-        .mean()
-        .reset_index()
+if not agg.empty:
+    st.bar_chart(
+        agg.set_index("model_name")[["faithfulness", "relevance"]]
+        .rename(columns={"faithfulness": "Faithfulness", "relevance": "Relevance"}),
+        color=["#667eea", "#764ba2"],
+        stack=False,
+        x_label="Model",
+        y_label="Average Score",
+        height=400
     )
-
-    if not agg.empty:
-        # Set style for matplotlib
-        plt.style.use('seaborn-v0_8-darkgrid')
-        
-        fig, ax = plt.subplots(figsize=(12, 5))
-        fig.patch.set_facecolor('white')
-        ax.set_facecolor('#f9fafb')
-        
-        width = 0.35
-        x = np.arange(len(agg))
-        
-        bars1 = ax.bar(x - width/2, agg["faithfulness"], width=width, 
-                       label="Faithfulness", color="#667eea", alpha=0.8, edgecolor='white', linewidth=1.5)
-        bars2 = ax.bar(x + width/2, agg["relevance"], width=width, 
-                       label="Relevance", color="#764ba2", alpha=0.8, edgecolor='white', linewidth=1.5)
-        
-        ax.set_xticks(x)
-        ax.set_xticklabels(agg["model_name"], rotation=45, ha="right", fontsize=10, fontweight='500')
-        ax.set_ylabel("Average Score", fontsize=11, fontweight='600', color='#374151')
-        ax.set_ylim(0, 5.5)
-        ax.legend(frameon=True, fancybox=True, shadow=True, fontsize=10)
-        ax.grid(axis='y', alpha=0.3, linestyle='--')
-        ax.spines['top'].set_visible(False)
-        ax.spines['right'].set_visible(False)
-        
-        plt.tight_layout()
-        st.pyplot(fig)
-    else:
-        st.info("ℹ️ No aggregated data available for selected filters.")
 else:
     st.info("ℹ️ No data matches the selected filters.")
 
@@ -266,33 +406,17 @@ col1, col2 = st.columns([2, 1])
 with col1:
     model_for_trend = st.selectbox("Select model for trend analysis", models, key="trend_model")
 
-trend_df = df[df["model_name"] == model_for_trend].sort_values("created_at")
+trend_df = trend_slice(fingerprint, identity, watermark, model_for_trend)
 
 if not trend_df.empty and len(trend_df) > 1:
-    trend_df["created_at"] = pd.to_datetime(trend_df["created_at"], errors="coerce")
-
-    fig2, ax2 = plt.subplots(figsize=(14, 5))
-    fig2.patch.set_facecolor('white')
-    ax2.set_facecolor('#f9fafb')
-    
-    ax2.plot(trend_df["created_at"], trend_df["faithfulness"], "-o", 
-             label="Faithfulness", color="#667eea", linewidth=2.5, 
-             markersize=7, markerfacecolor="#667eea", markeredgecolor="white", markeredgewidth=2)
-    ax2.plot(trend_df["created_at"], trend_df["relevance"], "-o", 
-             label="Relevance", color="#764ba2", linewidth=2.5, 
-             markersize=7, markerfacecolor="#764ba2", markeredgecolor="white", markeredgewidth=2)
-    
-    ax2.set_xlabel("Date & Time", fontsize=11, fontweight='600', color='#374151')
-    ax2.set_ylabel("Score (1–5)", fontsize=11, fontweight='600', color='#374151')
-    ax2.legend(frameon=True, fancybox=True, shadow=True, fontsize=10)
-    ax2.grid(True, linestyle="--", alpha=0.3)
-    ax2.spines['top'].set_visible(False)
-    ax2.spines['right'].set_visible(False)
-    ax2.xaxis.set_major_formatter(DateFormatter("%b %d %H:%M"))
-    
-    plt.tight_layout()
-    fig2.autofmt_xdate()
-    st.pyplot(fig2)
+    st.line_chart(
+        trend_df.set_index("created_at")[["faithfulness", "relevance"]]
+        .rename(columns={"faithfulness": "Faithfulness", "relevance": "Relevance"}),
+        color=["#667eea", "#764ba2"],
+        x_label="Date & Time",
+        y_label="Score (1–5)",
+        height=400
+    )
 else:
     st.info("ℹ️ Not enough data points for trend visualization. Need at least 2 data points.")
 
@@ -303,45 +427,21 @@ st.markdown("---")
 
 st.markdown("### ⚡ Latency Trend Analysis")
 
-latency_df = df[df["model_name"] == model_for_trend].sort_values("created_at")
-if not latency_df.empty and len(latency_df) > 1:
-    latency_df["created_at"] = pd.to_datetime(latency_df["created_at"], errors="coerce")
+if not trend_df.empty and len(trend_df) > 1:
+    latency_chart = trend_df.set_index("created_at")[["latency"]].rename(columns={"latency": "Response Time"})
 
-    fig3, ax3 = plt.subplots(figsize=(14, 5))
-    fig3.patch.set_facecolor('white')
-    ax3.set_facecolor('#f9fafb')
-    
-    ax3.plot(
-        latency_df["created_at"],
-        latency_df["latency"],
-        color="#ef4444",
-        linewidth=3,
-        marker="o",
-        markersize=8,
-        markerfacecolor="#ef4444",
-        markeredgecolor="#ffffff",
-        markeredgewidth=2,
-        label="Response Time"
-    )
-    
     # Add average line
-    avg_latency = latency_df["latency"].mean()
-    ax3.axhline(y=avg_latency, color='#f59e0b', linestyle='--', 
-                linewidth=2, alpha=0.7, label=f'Average: {avg_latency:.2f}s')
-
-    ax3.set_xlabel("Date & Time", fontsize=11, fontweight='600', color='#374151')
-    ax3.set_ylabel("Latency (seconds)", fontsize=11, fontweight='600', color='#374151')
-    ax3.set_title(f"Response Time for {model_for_trend}", fontsize=13, 
-                  fontweight='bold', color='#1f2937', pad=20)
-    ax3.grid(True, linestyle="--", alpha=0.3)
-    ax3.legend(frameon=True, fancybox=True, shadow=True, fontsize=10)
-    ax3.spines['top'].set_visible(False)
-    ax3.spines['right'].set_visible(False)
-    ax3.xaxis.set_major_formatter(DateFormatter("%b %d %H:%M"))
-    
-    plt.tight_layout()
-    fig3.autofmt_xdate()
-    st.pyplot(fig3)
+    avg_latency = latency_chart["Response Time"].mean()
+    latency_chart[f"Average: {avg_latency:.2f}s"] = avg_latency
+
+    st.caption(f"Response Time for {model_for_trend}")
+    st.line_chart(
+        latency_chart,
+        color=["#ef4444", "#f59e0b"],
+        x_label="Date & Time",
+        y_label="Latency (seconds)",
+        height=400
+    )
 else:
     st.info("ℹ️ Not enough latency data available for visualization.")
 
@@ -357,22 +457,29 @@ col1, col2, col3 = st.columns([2, 1, 1])
 with col1:
     search_term = st.text_input("🔍 Search in data", "", placeholder="Search by model name, sample ID...")
 with col2:
-    sort_column = st.selectbox("Sort by", ["created_at", "faithfulness", "relevance", "latency"])
+    sort_column = st.selectbox("Sort by", SORT_COLUMNS)
 with col3:
     sort_order = st.radio("Order", ["Descending", "Ascending"], horizontal=True)
 
-# Apply search filter
-if search_term:
-    display_df = filtered[
-        filtered["model_name"].str.contains(search_term, case=False) |
-        filtered["sample_id"].astype(str).str.contains(search_term, case=False)
-    ]
-else:
-    display_df = filtered
-
-# Apply sorting
 ascending = sort_order == "Ascending"
-display_df = display_df.sort_values(sort_column, ascending=ascending).reset_index(drop=True)
+detail_filters = (fingerprint, tuple(model_sel), tuple(sample_sel), search_term)
+
+# Page through the matching rows in SQLite; go back to page 1 when the query changes
+page_query = (tuple(model_sel), tuple(sample_sel), search_term, sort_column, ascending)
+if st.session_state.get("page_query") != page_query:
+    st.session_state["page_query"] = page_query
+    st.session_state["page"] = 0
+
+total_rows = count_detail_rows(*detail_filters)
+page_count = max(1, -(-total_rows // PAGE_SIZE))
+page = min(st.session_state["page"], page_count - 1)
+
+
+def go_to_page(target: int):
+    st.session_state["page"] = target
+
+
+display_df = load_detail_page(*detail_filters, sort_column, ascending, page)
 
 # Display dataframe with custom styling
 st.dataframe(
@@ -381,7 +488,23 @@ st.dataframe(
     height=400
 )
 
-st.caption(f"Showing {len(display_df)} of {len(filtered)} evaluations")
+col1, col2, col3 = st.columns([1, 3, 1])
+with col1:
+    st.button("◀ Previous", on_click=go_to_page, args=(page - 1,), disabled=page == 0)
+with col2:
+    first_row = page * PAGE_SIZE + 1 if total_rows else 0
+    st.caption(
+        f"Showing rows {first_row:,}–{page * PAGE_SIZE + len(display_df):,} "
+        f"of {total_rows:,} evaluations (page {page + 1} of {page_count})"
+    )
+with col3:
+    st.button("Next ▶", on_click=go_to_page, args=(page + 1,), disabled=page >= page_count - 1)
+
+# Raw rows carry the large query/context columns, so only read them on demand
+with st.expander("🗂️ Raw Evaluation Rows"):
+    if st.checkbox("Load query and context columns", key="load_raw"):
+        raw_df = load_raw(fingerprint, tuple(model_sel), tuple(sample_sel))
+        st.dataframe(raw_df, use_container_width=True, height=400)
 
 
 # Footer
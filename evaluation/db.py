@@ -1,40 +1,123 @@
 import sqlite3
 import os
-from typing import Dict, Any
+import atexit
+import threading
+from collections import deque
+from typing import Dict, Any, List
 
 DB_DIR = "evaluation"
 DB_PATH = os.path.join(DB_DIR, "eval_results.db")
 
+# save_evaluation buffers rows and flushes every FLUSH_ROWS rows or FLUSH_SECONDS
+FLUSH_ROWS = 100
+FLUSH_SECONDS = 1.0
+# Consecutive failed flushes of a database before its buffered rows are dropped
+MAX_FLUSH_RETRIES = 5
+
+INSERT_SQL = """
+INSERT INTO evaluations (
+    trace_id, model_name, sample_id, query, context,
+    faithfulness, relevance, latency, created_at, cache_hit
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# One persistent connection per database file, shared across threads
+_LOCK = threading.RLock()
+_CONNECTIONS: Dict[str, sqlite3.Connection] = {}
+_PENDING: Dict[str, deque] = {}
+_TIMERS: Dict[str, threading.Timer] = {}
+_RETRIES: Dict[str, int] = {}
+
+def _connect(db_path: str = DB_PATH) -> sqlite3.Connection:
+    """Open a connection with WAL enabled so dashboard reads don't block writes."""
+    conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+    if not db_path.endswith(":memory:"):
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA mmap_size=268435456")  # 256 MiB
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+def _get_conn(db_path: str = DB_PATH) -> sqlite3.Connection:
+    """Return the pooled connection for db_path, opening it on first use."""
+    with _LOCK:
+        conn = _CONNECTIONS.get(db_path)
+        if conn is None:
+            conn = _connect(db_path)
+            _CONNECTIONS[db_path] = conn
+        return conn
+
 def init_db(db_path: str = DB_PATH):
-    os.makedirs(os.path.dirname(db_path), exist_ok=True)
-    conn = sqlite3.connect(db_path)
-    c = conn.cursor()
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS evaluations (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        trace_id TEXT,
-        model_name TEXT,
-        sample_id TEXT,
-        query TEXT,
-        context TEXT,
-        faithfulness INTEGER,
-        relevance INTEGER,
-        latency REAL,
-        created_at INTEGER
+    db_dir = os.path.dirname(db_path)
+    if db_dir:
+        os.makedirs(db_dir, exist_ok=True)
+    conn = _get_conn(db_path)
+    with _LOCK:
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS evaluations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            trace_id TEXT,
+            model_name TEXT,
+            sample_id TEXT,
+            query TEXT,
+            context TEXT,
+            faithfulness INTEGER,
+            relevance INTEGER,
+            latency REAL,
+            created_at INTEGER,
+            cache_hit INTEGER DEFAULT 0
+        )
+        """)
+        # Databases created before judge caching lack the cache_hit column
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(evaluations)")}
+        if "cache_hit" not in columns:
+            conn.execute("ALTER TABLE evaluations ADD COLUMN cache_hit INTEGER DEFAULT 0")
+        # Dashboard queries filter by model/sample and order by created_at
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_eval_model_created ON evaluations(model_name, created_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_eval_sample ON evaluations(sample_id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_eval_created ON evaluations(created_at)")
+        try:
+            _init_search_index(conn)
+        except sqlite3.OperationalError as e:
+            print(f"Search index unavailable (SQLite built without FTS5 trigram?): {e}")
+
+def _init_search_index(conn: sqlite3.Connection):
+    """Trigram FTS5 index over model_name/sample_id, kept in sync by triggers."""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='evaluations_fts'"
+    ).fetchone()
+    conn.execute("""
+    CREATE VIRTUAL TABLE IF NOT EXISTS evaluations_fts USING fts5(
+        model_name, sample_id,
+        content='evaluations', content_rowid='id', tokenize='trigram'
     )
     """)
-    conn.commit()
-    conn.close()
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS evaluations_fts_ai AFTER INSERT ON evaluations BEGIN
+        INSERT INTO evaluations_fts(rowid, model_name, sample_id)
+        VALUES (new.id, new.model_name, new.sample_id);
+    END
+    """)
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS evaluations_fts_ad AFTER DELETE ON evaluations BEGIN
+        INSERT INTO evaluations_fts(evaluations_fts, rowid, model_name, sample_id)
+        VALUES ('delete', old.id, old.model_name, old.sample_id);
+    END
+    """)
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS evaluations_fts_au AFTER UPDATE ON evaluations BEGIN
+        INSERT INTO evaluations_fts(evaluations_fts, rowid, model_name, sample_id)
+        VALUES ('delete', old.id, old.model_name, old.sample_id);
+        INSERT INTO evaluations_fts(rowid, model_name, sample_id)
+        VALUES (new.id, new.model_name, new.sample_id);
+    END
+    """)
+    if not exists:
+        # Index rows written before the search index existed
+        conn.execute("INSERT INTO evaluations_fts(evaluations_fts) VALUES ('rebuild')")
 
-def save_evaluation(record: Dict[str, Any], db_path: str = DB_PATH):
-    conn = sqlite3.connect(db_path)
-    c = conn.cursor()
-    c.execute("""
-    INSERT INTO evaluations (
-        trace_id, model_name, sample_id, query, context,
-        faithfulness, relevance, latency, created_at
-    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
+def _to_row(record: Dict[str, Any]) -> tuple:
+    return (
         record.get("trace_id"),
         record.get("model_name"),
         record.get("sample_id"),
@@ -44,6 +127,105 @@ def save_evaluation(record: Dict[str, Any], db_path: str = DB_PATH):
         int(record.get("relevance", 0)),
         float(record.get("latency", 0.0)),
         int(record.get("created_at")),
-    ))
-    conn.commit()
-    conn.close()
+        int(bool(record.get("cache_hit", False))),
+    )
+
+def save_evaluations(records: List[Dict[str, Any]], db_path: str = DB_PATH):
+    """Insert many records in a single transaction (one commit for the batch)."""
+    rows = [_to_row(r) for r in records]
+    if not rows:
+        return
+    conn = _get_conn(db_path)
+    with _LOCK:
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(INSERT_SQL, rows)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+def _schedule_flush(db_path: str):
+    if db_path not in _TIMERS:
+        timer = threading.Timer(FLUSH_SECONDS, flush_evaluations, args=(db_path,))
+        timer.daemon = True
+        _TIMERS[db_path] = timer
+        timer.start()
+
+def _write_pending(db_path: str, pending: deque, final: bool = False):
+    """
+    Save the buffered records; ones that can't be written yet go back in the buffer.
+    
+    After MAX_FLUSH_RETRIES failed flushes in a row, or on the final flush at exit,
+    unwritable records are reported and dropped instead of retried.
+    """
+    records = list(pending)
+    pending.clear()
+    try:
+        save_evaluations(records, db_path)
+        _RETRIES.pop(db_path, None)
+        return
+    except sqlite3.OperationalError as e:
+        # Database locked or I/O error: keep the whole batch for the next flush
+        error = e
+        retry = records
+    except Exception as e:
+        # A record SQLite rejects: write the rest one by one so it can't take them down too
+        print(f"Batched save failed, saving {len(records)} evaluations one by one: {e}")
+        error = e
+        retry = []
+        for record in records:
+            try:
+                save_evaluations([record], db_path)
+            except sqlite3.OperationalError as row_error:
+                error = row_error
+                retry.append(record)
+            except Exception as row_error:
+                print(f"Dropping evaluation {record.get('trace_id')} that cannot be saved: {row_error}")
+    if not retry:
+        _RETRIES.pop(db_path, None)
+        return
+    attempts = _RETRIES.get(db_path, 0) + 1
+    if final or attempts > MAX_FLUSH_RETRIES:
+        _RETRIES.pop(db_path, None)
+        print(f"Dropping {len(retry)} buffered evaluations that could not be saved: {error}")
+        return
+    _RETRIES[db_path] = attempts
+    print(f"Failed to save {len(retry)} buffered evaluations, will retry "
+          f"({attempts}/{MAX_FLUSH_RETRIES}): {error}")
+    pending.extendleft(reversed(retry))
+    _schedule_flush(db_path)
+
+def flush_evaluations(db_path: str = None, final: bool = False) -> int:
+    """
+    Write out buffered save_evaluation records (all databases if db_path is None).
+    
+    final=True drops records that can't be written instead of scheduling a retry.
+    Returns how many records are still buffered because they could not be written.
+    """
+    remaining = 0
+    with _LOCK:
+        paths = [db_path] if db_path else list(_PENDING)
+        for path in paths:
+            timer = _TIMERS.pop(path, None)
+            if timer is not None:
+                timer.cancel()
+            pending = _PENDING.get(path)
+            if pending:
+                _write_pending(path, pending, final)
+                remaining += len(pending)
+    return remaining
+
+def save_evaluation(record: Dict[str, Any], db_path: str = DB_PATH):
+    """Buffer a record; it is written once FLUSH_ROWS accumulate or FLUSH_SECONDS pass."""
+    _to_row(record)  # fail fast on bad values instead of at flush time
+    with _LOCK:
+        pending = _PENDING.setdefault(db_path, deque())
+        pending.append(record)
+        if len(pending) >= FLUSH_ROWS:
+            flush_evaluations(db_path)
+        else:
+            _schedule_flush(db_path)
+
+# Retry timers can't run during interpreter shutdown, so the exit flush is final
+atexit.register(flush_evaluations, final=True)
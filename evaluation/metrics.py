@@ -1,4 +1,6 @@
 import os
+import re
+import hashlib
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_ollama import ChatOllama
 from dotenv import load_dotenv
@@ -11,6 +13,53 @@ JUDGE_MODEL = ChatOllama( # <--- CHANGED
     temperature=0 # Low temperature for reliable evaluation
 )
 
+# Both rubrics in one prompt: a single judge forward pass scores both metrics
+JUDGE_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are an expert AI quality evaluator. Rate the 'Model Output' on two metrics, each on a scale of 1 to 5. "
+               "Faithfulness (lack of hallucination) is judged against the 'Reference Context': 5 is perfectly faithful, 1 is completely hallucinated. "
+               "Relevance is judged against the 'Input Query': 5 is perfectly relevant, 1 is completely irrelevant. "
+               "Return ONLY one line in the form: faithfulness=X relevance=Y"),
+    ("user", "Input Query: {input_text}\n\nModel Output: {model_output}\n\nReference Context: {reference_context}")
+])
+
+# Parses the judge's "faithfulness=X relevance=Y" verdict, tolerating markdown
+# around the labels and an "out of 5" suffix (e.g. "**Faithfulness**: 4/5")
+SCORE_PATTERN = re.compile(
+    r"faithfulness\W*(\d+)\b(?:\s*/\s*5\b)?\D+?relevance\W*(\d+)\b",
+    re.IGNORECASE
+)
+
+# Batched variant: one judge call scores up to BATCH_SIZE samples
+BATCH_SIZE = 8
+
+BATCH_JUDGE_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are an expert AI quality evaluator. You will be given numbered items, each with an 'Input Query', a 'Model Output' and a 'Reference Context'. "
+               "For every item, rate the 'Model Output' on two metrics, each on a scale of 1 to 5. "
+               "Faithfulness (lack of hallucination) is judged against the 'Reference Context': 5 is perfectly faithful, 1 is completely hallucinated. "
+               "Relevance is judged against the 'Input Query': 5 is perfectly relevant, 1 is completely irrelevant. "
+               "Return ONLY one line per item in the form: i: faithfulness=X relevance=Y"),
+    ("user", "{items}")
+])
+
+# Parses "i: faithfulness=X relevance=Y" lines from a batched verdict
+BATCH_SCORE_PATTERN = re.compile(
+    r"^\W*(\d+)\W+faithfulness\W*(\d+)\b(?:\s*/\s*5\b)?\D+?relevance\W*(\d+)\b",
+    re.IGNORECASE | re.MULTILINE
+)
+
+# Fingerprint of both rubrics; cached judge scores are only reused under the same prompts
+JUDGE_VERSION = hashlib.blake2b(
+    (JUDGE_PROMPT.pretty_repr() + BATCH_JUDGE_PROMPT.pretty_repr()).encode(), digest_size=8
+).hexdigest()
+
+def _to_scores(faithfulness: str, relevance: str) -> dict:
+    """Validate a parsed verdict; anything outside the 1-5 rubric is a judge error."""
+    scores = {"faithfulness_score": int(faithfulness), "relevance_score": int(relevance)}
+    for name, value in scores.items():
+        if not 1 <= value <= 5:
+            raise ValueError(f"{name} out of range 1-5: {value}")
+    return scores
+
 def evaluate_hallucination_and_relevance(
     input_text: str, 
     model_output: str, 
@@ -22,27 +71,54 @@ def evaluate_hallucination_and_relevance(
     This is an example of a custom LLM-as-a-Judge evaluation.
     """
     
-    # 1. Hallucination/Faithfulness Check Prompt
-    hallucination_prompt = ChatPromptTemplate.from_messages([
-        ("system", "You are an expert AI quality evaluator. Your task is to rate the 'Model Output' based on the 'Reference Context'. Rate the faithfulness (lack of hallucination) on a scale of 1 to 5. 5 is perfectly faithful, 1 is completely hallucinated. Return ONLY the score."),
-        ("user", f"Model Output: {model_output}\n\nReference Context: {reference_context}")
-    ])
-    
-    # 2. Relevance Check Prompt
-    relevance_prompt = ChatPromptTemplate.from_messages([
-        ("system", "You are an expert AI quality evaluator. Your task is to rate the 'Model Output' based on the original 'Input Query'. Rate the relevance on a scale of 1 to 5. 5 is perfectly relevant, 1 is completely irrelevant. Return ONLY the score."),
-        ("user", f"Input Query: {input_text}\n\nModel Output: {model_output}")
-    ])
-    
-    # Run the judge on both metrics
+    # Run the judge once for both metrics
     try:
-        faithfulness_score = JUDGE_MODEL.invoke(hallucination_prompt.format_messages(model_output=model_output, reference_context=reference_context)).content.strip()
-        relevance_score = JUDGE_MODEL.invoke(relevance_prompt.format_messages(input_text=input_text, model_output=model_output)).content.strip()
+        verdict = JUDGE_MODEL.invoke(JUDGE_PROMPT.format_messages(
+            input_text=input_text,
+            model_output=model_output,
+            reference_context=reference_context
+        )).content.strip()
+        
+        match = SCORE_PATTERN.search(verdict)
+        if not match:
+            raise ValueError(f"unparseable judge output: {verdict!r}")
         
-        return {
-            "faithfulness_score": int(faithfulness_score.split()[0]),
-            "relevance_score": int(relevance_score.split()[0])
-        }
+        return _to_scores(match.group(1), match.group(2))
     except Exception as e:
         print(f"Evaluation failed: {e}")
-        return {"faithfulness_score": 0, "relevance_score": 0}
\ No newline at end of file
+        return {"faithfulness_score": 0, "relevance_score": 0}
+
+
+def evaluate_batch(samples: list) -> list:
+    """
+    Scores many samples with one judge call per BATCH_SIZE chunk.
+    
+    Each sample is a dict with 'input_text', 'model_output' and 'reference_context'
+    (the arguments of evaluate_hallucination_and_relevance). Results come back in
+    input order; samples missing from the judge's reply are re-scored one by one.
+    """
+    results = []
+    for start in range(0, len(samples), BATCH_SIZE):
+        chunk = samples[start:start + BATCH_SIZE]
+        items = "\n\n".join(
+            f"{i}: Input Query: {item['input_text']}\nModel Output: {item['model_output']}\nReference Context: {item['reference_context']}"
+            for i, item in enumerate(chunk, start=1)
+        )
+        
+        scores = {}
+        try:
+            verdict = JUDGE_MODEL.invoke(BATCH_JUDGE_PROMPT.format_messages(items=items)).content
+            for match in BATCH_SCORE_PATTERN.finditer(verdict):
+                try:
+                    scores[int(match.group(1))] = _to_scores(match.group(2), match.group(3))
+                except ValueError as e:
+                    # Leave the item out so it is re-scored on its own below
+                    print(f"Ignoring batch verdict for item {match.group(1)}: {e}")
+        except Exception as e:
+            print(f"Batch evaluation failed: {e}")
+        
+        for i, sample in enumerate(chunk, start=1):
+            results.append(scores.get(i) or evaluate_hallucination_and_relevance(
+                sample["input_text"], sample["model_output"], sample["reference_context"]
+            ))
+    return results
@@ -1,14 +1,24 @@
 import os
 import time
-import json
+import asyncio
+import aiohttp
+import orjson
 import requests
 import argparse
 import base64
+import atexit
+import hashlib
+import functools
+import uuid
+import diskcache
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from langchain_ollama import ChatOllama
 from langfuse import get_client, observe
-from evaluation.metrics import evaluate_hallucination_and_relevance
-from evaluation.db import init_db, save_evaluation
+from evaluation.metrics import JUDGE_MODEL, JUDGE_VERSION, BATCH_SIZE, evaluate_batch, evaluate_hallucination_and_relevance
+from evaluation.db import init_db, save_evaluations
 
 
 # Load environment variables and initialize Langfuse client
@@ -22,106 +32,261 @@ os.environ["OTEL_EXPORTER_OTLP_TIMEOUT"] = os.getenv("OTEL_EXPORTER_OTLP_TIMEOUT
 # Initialize local SQLite DB
 init_db()
 
+# Target-model prompt, bound once as a str.format method
+_FORMAT_PROMPT = "Using the following context, answer the query:\n\nQuery: {q}\n\nContext: {c}".format
+
+
+@functools.lru_cache(maxsize=None)
+def _get_ollama(model: str, temp: float) -> ChatOllama:
+    """One ChatOllama client (and HTTP connection pool) per model/temperature."""
+    return ChatOllama(model=model, temperature=temp)
+
+
+@observe(name="Model-Call", as_type="generation")
+async def _ado_model_call(model: ChatOllama, prompt: str) -> str:
+    return (await model.ainvoke(prompt)).content
+
+
+# On-disk cache of judge scores, so re-running an unchanged sample skips the judge
+_judge_cache = diskcache.Cache(".cache/judge")
+
+
+def _judge_cache_key(query: str, context: str, model_output: str) -> str:
+    key = {"q": query, "c": context, "o": model_output, "judge": JUDGE_MODEL.model,
+           "rubric": JUDGE_VERSION}
+    return hashlib.blake2b(orjson.dumps(key, option=orjson.OPT_SORT_KEYS), digest_size=16).hexdigest()
+
+
+# Shared HTTP session for mode='api', so every sample reuses its connection pool.
+# aiohttp sessions must be created inside the running event loop, hence lazily.
+_HTTP_SESSION = None
+
+
+def _get_http_session() -> aiohttp.ClientSession:
+    global _HTTP_SESSION
+    if _HTTP_SESSION is None or _HTTP_SESSION.closed:
+        _HTTP_SESSION = aiohttp.ClientSession()
+    return _HTTP_SESSION
+
+
+async def _read_sse_output(resp: aiohttp.ClientResponse) -> str:
+    """Join the `content` of a server-sent-event stream's `data:` lines, stopping at [DONE]."""
+    chunks = []
+    async for line in resp.content:
+        if not line.startswith(b"data:"):
+            continue
+        data = line[len(b"data:"):].strip()
+        if data == b"[DONE]":
+            break
+        event = orjson.loads(data)
+        content = event.get("content") if isinstance(event, dict) else event
+        if content:
+            chunks.append(str(content))
+    return "".join(chunks)
+
+
+async def close_http_session():
+    global _HTTP_SESSION
+    if _HTTP_SESSION is not None:
+        await _HTTP_SESSION.close()
+        _HTTP_SESSION = None
+
+
+# Langfuse endpoint and Basic Auth header, resolved once at import
+_LF_BASE = os.getenv("LANGFUSE_HOST")
+_LF_PK = os.getenv("LANGFUSE_PUBLIC_KEY")
+_LF_SK = os.getenv("LANGFUSE_SECRET_KEY")
+_LF_AUTH = "Basic " + base64.b64encode(f"{_LF_PK}:{_LF_SK}".encode()).decode()
+_LF_URL = f"{_LF_BASE}/api/public/traces"
+_LF_ENABLED = all([_LF_BASE, _LF_PK, _LF_SK])
+
+# Prefix of the per-trace link printed after each evaluation
+_PROJECT_NAME = os.getenv("LANGCHAIN_PROJECT", "default")
+_TRACE_URL_PREFIX = f"{_LF_BASE}/project/{_PROJECT_NAME}/traces/"
+
+# Pooled keep-alive session for Langfuse, so each trace upload skips the TCP/TLS handshake
+_LF_SESSION = requests.Session()
+_LF_SESSION.headers.update({"Content-Type": "application/json", "Authorization": _LF_AUTH})
+_LF_ADAPTER = HTTPAdapter(pool_connections=16, pool_maxsize=16,
+                          max_retries=Retry(total=2, backoff_factor=0.2))
+_LF_SESSION.mount("https://", _LF_ADAPTER)
+_LF_SESSION.mount("http://", _LF_ADAPTER)
+
+# Metadata uploads run in the background; pending ones are flushed on exit
+_LF_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="langfuse-upload")
+atexit.register(_LF_POOL.shutdown, wait=True)
 
 
 #  Helper: Send scores + metadata to Langfuse (modern Basic Auth)
 
-def send_scores(trace_id: str, scores: list, model_name: str = None, sample_id: str = None):
-    """Attach metadata to Langfuse trace (skip /scores endpoint)."""
+def _post_metadata(payload: dict):
+    """Background task: POST trace metadata to Langfuse and log the outcome."""
     try:
-        base_url = os.getenv("LANGFUSE_HOST")
-        public_key = os.getenv("LANGFUSE_PUBLIC_KEY")
-        secret_key = os.getenv("LANGFUSE_SECRET_KEY")
-        if not all([base_url, public_key, secret_key]):
-            print("Missing Langfuse environment vars.")
-            return
-
-        # Build Basic Auth header
-        token = base64.b64encode(f"{public_key}:{secret_key}".encode()).decode()
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Basic {token}"
-        }
+        resp_meta = _LF_SESSION.post(
+            _LF_URL,
+            data=orjson.dumps(payload),  # Content-Type is set on the session
+            timeout=(3, 7)  # (connect, read)
+        )
+
+        if resp_meta.status_code == 200:
+            print(" Metadata successfully attached to trace .")
+        else:
+            print(f" Langfuse (metadata) responded with {resp_meta.status_code}: {resp_meta.text}")
+
+    except Exception as e:
+        print(f"Failed to send metadata to Langfuse: {e}")
+
 
+def _send_scores(trace_id: str, scores: list, model_name: str = None, sample_id: str = None,
+                 cache_hit: bool = False):
+    """Attach metadata to Langfuse trace (skip /scores endpoint) without blocking the caller."""
+    try:
         # Attach metadata (only) 
+        score_map = {s["name"]: s["value"] for s in scores}
         metadata_payload = {
             "traceId": trace_id,
             "metadata": {
                 "model_name": model_name or "unknown_model",
                 "sample_id": sample_id or "unknown_sample",
-                "latency": next((s["value"] for s in scores if s.get("name") == "latency"), None),
-                "faithfulness": next((s["value"] for s in scores if s.get("name") == "faithfulness"), None),
-                "relevance": next((s["value"] for s in scores if s.get("name") == "relevance"), None),
+                "latency": score_map.get("latency"),
+                "faithfulness": score_map.get("faithfulness"),
+                "relevance": score_map.get("relevance"),
+                "judge_cache_hit": cache_hit,
                 "timestamp": int(time.time())
             }
         }
 
-        resp_meta = requests.post(
-            f"{base_url}/api/public/traces",
-            headers=headers,
-            data=json.dumps(metadata_payload),
-            timeout=10
-        )
-
-        if resp_meta.status_code == 200:
-            print(" Metadata successfully attached to trace .")
-        else:
-            print(f" Langfuse (metadata) responded with {resp_meta.status_code}: {resp_meta.text}")
+        _LF_POOL.submit(_post_metadata, metadata_payload)
 
     except Exception as e:
         print(f"Failed to send metadata to Langfuse: {e}")
 
 
+def _send_scores_disabled(*args, **kwargs):
+    """Stand-in for send_scores when Langfuse isn't configured."""
+    return None
+
+
+# Decide once whether metadata uploads are possible instead of re-checking per sample
+if _LF_ENABLED:
+    send_scores = _send_scores
+else:
+    print("Missing Langfuse environment vars; trace metadata uploads are disabled.")
+    send_scores = _send_scores_disabled
+
+
+#  Helper: turn judge scores into a Langfuse upload and a local DB record
+
+def _record_evaluation(trace_id: str, query: str, context: str, model_output: str, latency: float,
+                       model_name: str, sample_id: str, eval_scores: dict, cache_hit: bool) -> dict:
+    """Send judge scores to Langfuse and build the result (with its local DB record)."""
+    # Prepare validated numeric scores
+    scores = [
+        {"name": "latency", "value": float(latency)},
+        {"name": "faithfulness", "value": float(eval_scores.get("faithfulness_score", 0))},
+        {"name": "relevance", "value": float(eval_scores.get("relevance_score", 0))},
+    ]
+
+  
+    # Send to Langfuse
+   
+    send_scores(trace_id, scores, model_name=model_name, sample_id=sample_id, cache_hit=cache_hit)
+
+    
+    # Local DB record
+  
+    record = {
+        "trace_id": trace_id,
+        "model_name": model_name,
+        "sample_id": sample_id,
+        "query": query,
+        "context": context,
+        "faithfulness": int(eval_scores.get("faithfulness_score", 0)),
+        "relevance": int(eval_scores.get("relevance_score", 0)),
+        "latency": float(latency),
+        "created_at": int(time.time()),
+        "cache_hit": cache_hit,
+    }
+
+  
+    # Print trace link for Langfuse
+   
+    trace_url = _TRACE_URL_PREFIX + trace_id
+    print(f" View Trace in Langfuse: {trace_url}")
+
+    return {
+        "model_output": model_output,
+        "faithfulness": record["faithfulness"],
+        "relevance": record["relevance"],
+        "latency": latency,
+        "trace_url": trace_url,
+        "record": record,
+    }
+
+
 #  Observed function for LLM execution and evaluation
 
 @observe(name="LLMSentinel-TestRun")
-def execute_and_observe_llm(
+async def execute_and_observe_llm(
     query: str,
     context: str,
     mode: str = "ollama",
     model_name: str = "model_default",
     sample_id: str = "sample_default",
-    api_url: str = None
+    api_url: str = None,
+    use_judge_cache: bool = True,
+    api_stream: bool = False,
+    judge: bool = True
 ):
     """
     mode: 'ollama' | 'manual' | 'api'
     - ollama: run local ChatOllama target model
     - manual: prompt for user to paste model output
     - api: fetch from local HTTP model endpoint specified by api_url
+      (api_stream=True reads a server-sent-event response instead of one JSON body)
+
+    use_judge_cache=False always re-runs the judge instead of reusing cached scores.
+    judge=False stops after the model call and returns only model_output, latency and
+    trace_id, so run_samples can score many samples per judge call.
     """
-    start_time = time.time()
+    start_time = time.perf_counter()
 
   
     # Select mode
    
     if mode == "ollama":
-        TARGET_MODEL = ChatOllama(
-            model=os.getenv("TARGET_MODEL_NAME", "llama3"),
-            temperature=float(os.getenv("TARGET_MODEL_TEMP", "0.7"))
+        TARGET_MODEL = _get_ollama(
+            os.getenv("TARGET_MODEL_NAME", "llama3"),
+            float(os.getenv("TARGET_MODEL_TEMP", "0.7"))
         )
 
-        @observe(name="Model-Call", as_type="generation")
-        def do_model_call(prompt):
-            return TARGET_MODEL.invoke(prompt).content
-
-        prompt = f"Using the following context, answer the query:\n\nQuery: {query}\n\nContext: {context}"
-        model_output = do_model_call(prompt)
+        prompt = _FORMAT_PROMPT(q=query, c=context)
+        model_output = await _ado_model_call(TARGET_MODEL, prompt)
 
     elif mode == "api":
         if not api_url:
             raise ValueError("api_url must be provided for mode='api'")
         try:
-            resp = requests.post(api_url, json={"query": query, "context": context}, timeout=30)
-            resp.raise_for_status()
-            body = resp.json()
-            model_output = body.get("output") or body.get("result") or str(body)
+            session = _get_http_session()
+            async with session.post(
+                api_url,
+                data=orjson.dumps({"query": query, "context": context}),
+                headers={"Content-Type": "application/json"},
+                timeout=aiohttp.ClientTimeout(total=30)
+            ) as resp:
+                resp.raise_for_status()
+                if api_stream:
+                    model_output = await _read_sse_output(resp)
+                else:
+                    body = orjson.loads(await resp.read())
+                    model_output = body.get("output") or body.get("result") or str(body)
         except Exception as e:
             print(f" API call failed: {e}")
             model_output = ""
 
     elif mode == "manual":
         print("\n Manual Evaluation Mode Active — paste your custom model output below:\n")
-        model_output = input("Paste model output (end with Enter):\n\n")
+        model_output = await asyncio.to_thread(input, "Paste model output (end with Enter):\n\n")
 
     else:
         raise ValueError("Invalid mode. Use 'ollama', 'manual', or 'api'.")
@@ -129,67 +294,198 @@ def execute_and_observe_llm(
   
     # Measure latency
    
-    latency = time.time() - start_time
+    latency = time.perf_counter() - start_time
     print(f"\n Model Output (first 200 chars): {model_output[:200]}...")
     print(f" Latency: {latency:.2f}s")
 
     # Retrieve or create trace ID
-    trace_id = lf.get_current_trace_id() or f"trace-{mode}-{int(time.time())}"
+    trace_id = lf.get_current_trace_id() or f"trace-{mode}-{uuid.uuid4().hex}"
     print(f" Trace ID: {trace_id}")
 
+    if not judge:
+        return {"model_output": model_output, "latency": latency, "trace_id": trace_id}
+
    
     # Evaluate using Judge (metrics.py)
   
-    print("\n Running LLM-as-a-Judge evaluation (metrics.py)...")
-    eval_scores = evaluate_hallucination_and_relevance(query, model_output, context)
+    cache_key = _judge_cache_key(query, context, model_output)
+    eval_scores = _judge_cache.get(cache_key) if use_judge_cache else None
+    cache_hit = eval_scores is not None
+    if cache_hit:
+        print("\n Reusing cached LLM-as-a-Judge scores.")
+    else:
+        print("\n Running LLM-as-a-Judge evaluation (metrics.py)...")
+        eval_scores = await asyncio.to_thread(evaluate_hallucination_and_relevance, query, model_output, context)
+        # Don't cache the all-zero fallback returned when the judge call fails
+        if use_judge_cache and any(eval_scores.values()):
+            _judge_cache.set(cache_key, eval_scores)
 
-    # Prepare validated numeric scores
-    scores = [
-        {"name": "latency", "value": float(latency)},
-        {"name": "faithfulness", "value": float(eval_scores.get("faithfulness_score", 0))},
-        {"name": "relevance", "value": float(eval_scores.get("relevance_score", 0))},
-    ]
+    result = _record_evaluation(trace_id, query, context, model_output, latency,
+                                model_name, sample_id, eval_scores, cache_hit)
 
-  
-    # Send to Langfuse
-   
-    send_scores(trace_id, scores, model_name=model_name, sample_id=sample_id)
+    try:
+        # Written synchronously, so the message below only prints once the row is on disk
+        save_evaluations([result["record"]])
+        print("Saved evaluation to local DB.")
+    except Exception as e:
+        print(f"Failed to save evaluation to DB: {e}")
 
+    return result
+
+
+#  Batch driver: fan out many samples concurrently
+
+def load_samples(path: str) -> list:
+    """Read (query, context[, sample_id]) rows from a JSONL file, skipping invalid lines."""
+    rows = []
+    with open(path, encoding="utf-8") as f:
+        for lineno, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = orjson.loads(line)
+            except orjson.JSONDecodeError as e:
+                print(f"Skipping line {lineno} of {path}: invalid JSON ({e})")
+                continue
+            if not isinstance(row, dict) or not isinstance(row.get("query"), str) \
+                    or not isinstance(row.get("context"), str):
+                print(f"Skipping line {lineno} of {path}: expected an object with string 'query' and 'context'")
+                continue
+            rows.append(row)
+    return rows
+
+
+async def run_samples(
+    rows: list,
+    mode: str = "ollama",
+    model_name: str = "model_default",
+    api_url: str = None,
+    concurrency: int = 4,
+    use_judge_cache: bool = True,
+    api_stream: bool = False
+) -> list:
+    """
+    Evaluate every row with at most `concurrency` requests in flight, then save them in one transaction.
     
-    # Save locally to DB
-  
-    record = {
-        "trace_id": trace_id,
-        "model_name": model_name,
-        "sample_id": sample_id,
-        "query": query,
-        "context": context,
-        "faithfulness": int(eval_scores.get("faithfulness_score", 0)),
-        "relevance": int(eval_scores.get("relevance_score", 0)),
-        "latency": float(latency),
-        "created_at": int(time.time()),
-    }
+    Model calls run first; samples that miss the judge cache are then scored
+    BATCH_SIZE at a time by evaluate_batch, one judge call per chunk.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    sample_ids = [row.get("sample_id", f"sample-{i}") for i, row in enumerate(rows, start=1)]
+
+    async def run_one(row, sample_id):
+        async with semaphore:
+            return await execute_and_observe_llm(
+                row["query"],
+                row["context"],
+                mode=mode,
+                model_name=model_name,
+                sample_id=sample_id,
+                api_url=api_url,
+                api_stream=api_stream,
+                judge=False
+            )
+
+    outputs = await asyncio.gather(
+        *(run_one(row, sample_id) for row, sample_id in zip(rows, sample_ids)),
+        return_exceptions=True
+    )
 
+    # Judge scores per row index: (scores, cache_hit)
+    judged = {}
+    misses = []
+    for i, (row, output) in enumerate(zip(rows, outputs)):
+        if isinstance(output, Exception):
+            print(f"Sample {i + 1} failed: {output}")
+            continue
+        cache_key = _judge_cache_key(row["query"], row["context"], output["model_output"])
+        cached = _judge_cache.get(cache_key) if use_judge_cache else None
+        if cached is not None:
+            judged[i] = (cached, True)
+        else:
+            misses.append((i, cache_key))
+
+    async def judge_chunk(chunk):
+        samples = [
+            {
+                "input_text": rows[i]["query"],
+                "model_output": outputs[i]["model_output"],
+                "reference_context": rows[i]["context"],
+            }
+            for i, _ in chunk
+        ]
+        async with semaphore:
+            return await asyncio.to_thread(evaluate_batch, samples)
+
+    chunks = [misses[start:start + BATCH_SIZE] for start in range(0, len(misses), BATCH_SIZE)]
+    print(f"\n Reusing cached LLM-as-a-Judge scores for {len(judged)} samples; "
+          f"judging {len(misses)} in {len(chunks)} batches...")
+    for chunk, chunk_scores in zip(chunks, await asyncio.gather(*(judge_chunk(c) for c in chunks))):
+        for (i, cache_key), eval_scores in zip(chunk, chunk_scores):
+            # Don't cache the all-zero fallback returned when the judge call fails
+            if use_judge_cache and any(eval_scores.values()):
+                _judge_cache.set(cache_key, eval_scores)
+            judged[i] = (eval_scores, False)
+
+    results = []
+    for i, (row, output) in enumerate(zip(rows, outputs)):
+        if isinstance(output, Exception):
+            results.append(output)
+            continue
+        eval_scores, cache_hit = judged[i]
+        results.append(_record_evaluation(
+            output["trace_id"], row["query"], row["context"], output["model_output"], output["latency"],
+            model_name, sample_ids[i], eval_scores, cache_hit
+        ))
+
+    records = [r["record"] for r in results if not isinstance(r, Exception)]
     try:
-        save_evaluation(record)
-        print("Saved evaluation to local DB.")
+        save_evaluations(records)
+        print(f"Saved {len(records)} evaluations to local DB.")
     except Exception as e:
-        print(f"Failed to save evaluation to DB: {e}")
+        print(f"Failed to save evaluations to DB: {e}")
+    return results
 
-  
-    # Print trace link for Langfuse
-   
-    project_name = os.getenv("LANGCHAIN_PROJECT", "default")
-    trace_url = f"{os.getenv('LANGFUSE_HOST')}/project/{project_name}/traces/{trace_id}"
-    print(f" View Trace in Langfuse: {trace_url}")
 
-    return {
-        "model_output": model_output,
-        "faithfulness": record["faithfulness"],
-        "relevance": record["relevance"],
-        "latency": latency,
-        "trace_url": trace_url,
-    }
+SAMPLE_QUERY = (
+    "Explain the concept of quantum entanglement in simple terms, "
+    "but do NOT use the word 'spooky'."
+)
+SAMPLE_CONTEXT = (
+    "Quantum entanglement is a phenomenon where two or more particles become "
+    "linked, or correlated, in such a way that measuring a property of one "
+    "instantaneously influences the corresponding property of the others, "
+    "regardless of the distance separating them."
+)
+
+
+async def main_async(args):
+    try:
+        if args.samples_jsonl:
+            rows = load_samples(args.samples_jsonl)
+            print(f" Evaluating {len(rows)} samples ({args.concurrency} in parallel)...")
+            await run_samples(
+                rows,
+                mode=args.mode,
+                model_name=args.model_name,
+                api_url=args.api_url,
+                concurrency=args.concurrency,
+                use_judge_cache=not args.no_judge_cache,
+                api_stream=args.api_stream
+            )
+        else:
+            await execute_and_observe_llm(
+                SAMPLE_QUERY,
+                SAMPLE_CONTEXT,
+                mode=args.mode,
+                model_name=args.model_name,
+                sample_id=args.sample_id,
+                api_url=args.api_url,
+                use_judge_cache=not args.no_judge_cache,
+                api_stream=args.api_stream
+            )
+    finally:
+        await close_http_session()
 
 
 
@@ -205,24 +501,30 @@ if __name__ == "__main__":
                         help="Sample/query identifier (e.g., 'q1' or 'smoke-01').")
     parser.add_argument("--api-url", type=str, default=None,
                         help="If mode=api, URL of model endpoint (e.g., http://localhost:5000/predict)")
+    parser.add_argument("--api-stream", action="store_true",
+                        help="If mode=api, read the endpoint's response as a server-sent-event stream "
+                             "of 'data: {\"content\": ...}' lines.")
+    parser.add_argument("--samples-jsonl", type=str, default=None,
+                        help="Evaluate every row of a JSONL file with 'query', 'context' and optional 'sample_id' "
+                             "(e.g., evaluation/dataset.jsonl) instead of the built-in sample.")
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="With --samples-jsonl, how many samples to evaluate in parallel. "
+                             "Recorded latency includes time a request waits at the model server, "
+                             "so use 1 when comparing latencies across runs.")
+    parser.add_argument("--no-judge-cache", action="store_true",
+                        help="Always re-run the judge instead of reusing cached scores from .cache/judge.")
     args = parser.parse_args()
 
-    SAMPLE_QUERY = (
-        "Explain the concept of quantum entanglement in simple terms, "
-        "but do NOT use the word 'spooky'."
-    )
-    SAMPLE_CONTEXT = (
-        "Quantum entanglement is a phenomenon where two or more particles become "
-        "linked, or correlated, in such a way that measuring a property of one "
-        "instantaneously influences the corresponding property of the others, "
-        "regardless of the distance separating them."
-    )
+    if args.samples_jsonl and args.mode == "manual":
+        parser.error("--samples-jsonl cannot be combined with --mode manual")
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
 
-    execute_and_observe_llm(
-        SAMPLE_QUERY,
-        SAMPLE_CONTEXT,
-        mode=args.mode,
-        model_name=args.model_name,
-        sample_id=args.sample_id,
-        api_url=args.api_url
-    )
+    # uvloop is optional; it speeds up the batch driver's event loop when installed
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+
+    asyncio.run(main_async(args))